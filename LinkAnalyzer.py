@@ -1,77 +1,143 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
 class LinkAnalyzer:
-    def __init__(self, link_structure):
+    def __init__(self, link_structure, tol=1e-6, max_iter=100):
         self.link_structure = link_structure
-    
+        self.tol = tol  # PageRank convergence threshold per page
+        self.max_iter = max_iter  # Maximum number of PageRank iterations
+        self._degree_stats = None
+        self._build_graph()
+
+    def invalidate(self):
+        """Drop cached results after link_structure has been modified."""
+        self._degree_stats = None
+        self._build_graph()
+
+    def _build_graph(self):
+        """Index the pages and build the PageRank transition matrix."""
+        # Pages that are linked to but were never crawled still take part in
+        # PageRank, they are appended after the crawled pages.
+        self._urls = list(self.link_structure)
+        self._url_to_idx = {url: i for i, url in enumerate(self._urls)}
+
+        indptr = [0]
+        indices = []
+        for links in self.link_structure.values():
+            for link in links:
+                idx = self._url_to_idx.get(link)
+                if idx is None:
+                    idx = self._url_to_idx[link] = len(self._urls)
+                    self._urls.append(link)
+                indices.append(idx)
+            indptr.append(len(indices))
+
+        # Uncrawled pages have no outgoing links
+        total_pages = len(self._urls)
+        indptr.extend([len(indices)] * (total_pages - len(self.link_structure)))
+        indptr = np.array(indptr, dtype=np.intp)
+
+        # Count outgoing links, repeats included, before building the matrix:
+        # SciPy may share indptr and sum_duplicates() rewrites it in place
+        self._link_counts = np.diff(indptr)
+
+        # Row i holds the links of page i. Repeated links to the same page
+        # collapse into one, then each row is split evenly over its links.
+        adjacency = csr_matrix(
+            (
+                np.ones(len(indices)),
+                np.array(indices, dtype=np.intp),
+                indptr,
+            ),
+            shape=(total_pages, total_pages),
+        )
+        adjacency.sum_duplicates()
+        self._unique_link_indices = adjacency.indices
+        adjacency.data.fill(1.0)
+        outgoing_counts = np.diff(adjacency.indptr)
+        adjacency.data /= np.repeat(outgoing_counts, outgoing_counts)
+
+        # Transpose so that M @ x pushes each page's score along its
+        # outgoing links.
+        self._transition = adjacency.T.tocsr()
+        self._dangling = np.flatnonzero(outgoing_counts == 0)
+
     def analyze_page_rank(self):
         """Calculate a simplified PageRank for each page."""
-        total_pages = len(self.link_structure)
-        scores = {url: 1.0 / total_pages for url in self.link_structure}
-        
-        # Perform iterations (simplified PageRank)
+        total_pages = len(self._urls)
+        if not total_pages:
+            return {}
+
+        # Iterate until converged or max_iter is reached
         damping_factor = 0.85
-        iterations = 10
-        
-        for _ in range(iterations):
-            new_scores = {url: (1.0 - damping_factor) / total_pages for url in self.link_structure}
-            
-            for source_url, links in self.link_structure.items():
-                unique_links = set(links)
-                if not unique_links:
-                    continue
-                
-                outbound_weight = scores[source_url] * damping_factor / len(unique_links)
-                
-                for target_url in unique_links:
-                    if target_url in new_scores:
-                        new_scores[target_url] += outbound_weight
-                    else:
-                        new_scores[target_url] = outbound_weight
-            
-            scores = new_scores
-        
-        return scores
+
+        # Two buffers are reused across iterations instead of allocating
+        # fresh score arrays every time.
+        scores = np.full(total_pages, 1.0 / total_pages)
+        new_scores = np.empty(total_pages)
+        for _ in range(self.max_iter):
+            # Pages without outgoing links spread their score over all pages
+            dangling_score = scores[self._dangling].sum()
+            np.multiply(self._transition.dot(scores), damping_factor, out=new_scores)
+            new_scores += (
+                1.0 - damping_factor + damping_factor * dangling_score
+            ) / total_pages
+            scores, new_scores = new_scores, scores
+
+            # Stop once the scores have converged. new_scores now holds the
+            # previous scores and is overwritten next iteration anyway, so
+            # the difference is computed in place.
+            np.subtract(scores, new_scores, out=new_scores)
+            np.abs(new_scores, out=new_scores)
+            if new_scores.sum() < total_pages * self.tol:
+                break
+
+        return dict(zip(self._urls, scores.tolist()))
     
+    def _compute_degree_stats(self):
+        """Count the incoming and outgoing links of every crawled page."""
+        if self._degree_stats is None:
+            crawled_pages = len(self.link_structure)
+
+            # Outgoing links include repeated links to the same page
+            outgoing = self._link_counts[:crawled_pages]
+
+            # Incoming links count each linking page once
+            incoming = np.bincount(
+                self._unique_link_indices, minlength=len(self._urls)
+            )[:crawled_pages]
+
+            self._degree_stats = (incoming, outgoing)
+
+        return self._degree_stats
+
     def find_orphaned_pages(self):
         """Find pages that aren't linked to by any other page."""
-        incoming_links = {url: 0 for url in self.link_structure}
-        
-        # Count incoming links
-        for _, links in self.link_structure.items():
-            for link in links:
-                if link in incoming_links:
-                    incoming_links[link] += 1
-        
+        incoming_links, _ = self._compute_degree_stats()
+
         # Return pages with no incoming links
-        return [url for url, count in incoming_links.items() if count == 0]
+        return [self._urls[i] for i in np.flatnonzero(incoming_links == 0)]
     
     def find_hubs(self):
         """Find pages with many outgoing links (hub pages)."""
-        if not self.link_structure:
+        _, outgoing_links = self._compute_degree_stats()
+        if not outgoing_links.size:
             return []
             
-        outgoing_counts = [len(links) for links in self.link_structure.values()]
-        avg_outgoing_links = sum(outgoing_counts) / len(self.link_structure)
-        threshold = max(avg_outgoing_links * 2, 10)
+        threshold = max(outgoing_links.mean() * 2, 10)
         
-        return [url for url, links in self.link_structure.items() if len(links) > threshold]
+        return [self._urls[i] for i in np.flatnonzero(outgoing_links > threshold)]
     
     def find_authorities(self):
         """Find pages with many incoming links (authority pages)."""
-        incoming_links = {url: 0 for url in self.link_structure}
-        
-        # Count incoming links
-        for _, links in self.link_structure.items():
-            for link in links:
-                if link in incoming_links:
-                    incoming_links[link] += 1
-        
-        if not incoming_links:
+        incoming_links, _ = self._compute_degree_stats()
+        if not incoming_links.size:
             return []
             
-        avg_incoming_links = sum(incoming_links.values()) / len(incoming_links)
-        threshold = max(avg_incoming_links * 2, 5)
+        threshold = max(incoming_links.mean() * 2, 5)
         
-        return [url for url, count in incoming_links.items() if count > threshold]
+        return [self._urls[i] for i in np.flatnonzero(incoming_links > threshold)]
     
     def print_analysis(self):
         """Print a detailed analysis of the link structure."""
@@ -82,7 +148,8 @@ class LinkAnalyzer:
         print("\n📌 Basic Statistics:")
         print(f"Total pages: {len(self.link_structure)}")
         
-        total_links = sum(len(links) for links in self.link_structure.values())
+        _, outgoing_links = self._compute_degree_stats()
+        total_links = int(outgoing_links.sum())
         print(f"Total links: {total_links}")
         print(f"Average links per page: {total_links / len(self.link_structure) if self.link_structure else 0}")
         
@@ -98,7 +165,7 @@ class LinkAnalyzer:
         hub_pages = self.find_hubs()
         print(f"\n📌 Hub Pages ({len(hub_pages)}):")
         for page in hub_pages[:5]:
-            print(f"- {page} ({len(self.link_structure.get(page, []))} outgoing links)")
+            print(f"- {page} ({outgoing_links[self._url_to_idx[page]]} outgoing links)")
         if len(hub_pages) > 5:
             print(f"... and {len(hub_pages) - 5} more")
         
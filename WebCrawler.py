@@ -1,12 +1,58 @@
-import requests
-from bs4 import BeautifulSoup
+import aiohttp
+import certifi
+import ssl
+from bs4 import BeautifulSoup, SoupStrainer
 from urllib.parse import urljoin, urlparse, urlunparse
 import time
 import os
 import hashlib
-from collections import deque
-import concurrent.futures
-import threading
+import asyncio
+import contextlib
+from functools import lru_cache
+
+# Only anchors with an href are needed to extract links
+_LINK_STRAINER = SoupStrainer("a", href=True)
+
+
+class _FilenameTable(dict):
+    """str.translate table replacing characters not allowed in filenames."""
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        replacement = char if char.isalnum() or char in "_-." else "_"
+        self[codepoint] = replacement
+        return replacement
+
+
+_FILENAME_TABLE = _FilenameTable()
+
+
+@lru_cache(maxsize=131072)
+def _normalize_url(url):
+    """Normalize a URL by removing fragments and standardizing format."""
+    try:
+        # Parse the URL
+        parsed = urlparse(url)
+
+        # Remove the fragment
+        normalized = urlunparse(
+            (
+                parsed.scheme,
+                parsed.netloc,
+                parsed.path,
+                parsed.params,
+                parsed.query,  # Query parameters are preserved
+                "",  # Empty fragment
+            )
+        )
+
+        # Ensure path ends with / if it's empty
+        if parsed.path == "":
+            normalized = normalized + "/"
+
+        return normalized
+    except Exception:
+        return url
 
 
 class WebCrawler:
@@ -19,6 +65,11 @@ class WebCrawler:
         max_workers=10,
         rate_limit=0.1,
     ):
+        # Without workers nothing would take URLs off the queue and the
+        # crawl would never finish
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+
         self.visited_urls = set()
         self.link_structure = {}
         self.max_depth = max_depth
@@ -27,50 +78,30 @@ class WebCrawler:
         self.base_domain = parsed_url.netloc
         self.save_path = save_path
         self.url_to_filename_map = {}  # Maps URLs to their filenames
-        self.max_workers = max_workers  # Number of worker threads
+        self.max_workers = max_workers  # Number of concurrent workers
         self.rate_limit = rate_limit  # Time delay between requests to same domain
 
-        # Locks for thread safety
-        self.visited_lock = threading.Lock()
-        self.structure_lock = threading.Lock()
-        self.file_lock = threading.Lock()
+        # HTTP session, only open while crawling
+        self.session = None
 
         # Domain access timestamps to implement rate limiting
         self.domain_timestamps = {}
-        self.domain_lock = threading.Lock()
+        self.domain_locks = {}  # One lock per domain
 
         # Create save directory if specified
-        if self.save_path and not os.path.exists(self.save_path):
-            os.makedirs(self.save_path)
+        if self.save_path:
+            os.makedirs(self.save_path, exist_ok=True)
 
     def normalize_url(self, url):
         """Normalize a URL by removing fragments and standardizing format."""
-        try:
-            # Parse the URL
-            parsed = urlparse(url)
-
-            # Remove the fragment
-            normalized = urlunparse(
-                (
-                    parsed.scheme,
-                    parsed.netloc,
-                    parsed.path,
-                    parsed.params,
-                    parsed.query,  # Query parameters are preserved
-                    "",  # Empty fragment
-                )
-            )
-
-            # Ensure path ends with / if it's empty
-            if parsed.path == "":
-                normalized = normalized + "/"
-
-            return normalized
-        except Exception:
-            return url
+        return _normalize_url(url)
 
     def crawl(self):
         """Crawl the website starting from seed_url and return the link structure."""
+        return asyncio.run(self._crawl())
+
+    async def _crawl(self):
+        """Run the crawl on an event loop with max_workers concurrent workers."""
         seed_url = (
             f"https://{self.base_domain}"
             if not urlparse(self.base_domain).scheme
@@ -81,93 +112,89 @@ class WebCrawler:
         seed_url = self.normalize_url(seed_url)
 
         # Initialize the work queue with the seed URL
-        queue = deque([(seed_url, 1)])
-
-        # Track URLs currently being processed to avoid duplicates
-        processing = set()
-        processing_lock = threading.Lock()
-
-        # Process URLs in batches until no more work
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.max_workers
-        ) as executor:
-            while queue:
-                # Get a batch of URLs to process
-                batch = []
-                with processing_lock:
-                    while queue and len(batch) < self.max_workers:
-                        url, depth = queue.popleft()
-
-                        # Skip if already visited or being processed
-                        if url in self.visited_urls or url in processing:
-                            continue
-
-                        # Skip if depth exceeds max_depth
-                        if depth > self.max_depth:
-                            continue
-
-                        # Mark as being processed
-                        processing.add(url)
-                        batch.append((url, depth))
-
-                if not batch:
-                    break
-
-                # Submit batch to thread pool
-                future_to_url = {
-                    executor.submit(self.process_url, url, depth): (url, depth)
-                    for url, depth in batch
-                }
-
-                # Process completed futures and collect new URLs
-                new_urls = []
-                for future in concurrent.futures.as_completed(future_to_url):
-                    url, depth = future_to_url[future]
-                    with processing_lock:
-                        processing.remove(url)
-
-                    try:
-                        # Get the results (new URLs to crawl)
-                        result_urls = future.result()
-                        if result_urls:
-                            # Add new URLs to process
-                            for new_url in result_urls:
-                                new_urls.append((new_url, depth + 1))
-                    except Exception as e:
-                        print(f"Error processing {url}: {e}")
-
-                # Add new URLs to the queue
-                with processing_lock:
-                    queue.extend(new_urls)
+        queue = asyncio.Queue()
+        queue.put_nowait((seed_url, 1))
+
+        # One session for the whole crawl, so connections to the same host
+        # are kept alive and reused. Certificates are checked against
+        # certifi's CA bundle and proxies and .netrc are read from the
+        # environment, as requests did.
+        connector = aiohttp.TCPConnector(
+            limit=self.max_workers,
+            ttl_dns_cache=300,
+            ssl=ssl.create_default_context(cafile=certifi.where()),
+        )
+        async with aiohttp.ClientSession(
+            connector=connector,
+            trust_env=True,
+            headers={"User-Agent": "PythonWebCrawler/1.0"},
+            # Like requests' timeout, limit the connect and each read but
+            # not the whole download
+            timeout=aiohttp.ClientTimeout(sock_connect=10, sock_read=10),
+        ) as session:
+            self.session = session
+            workers = [
+                asyncio.create_task(self._worker(queue))
+                for _ in range(self.max_workers)
+            ]
+
+            # Wait until every queued URL has been processed
+            await queue.join()
+
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.session = None
 
         return self.link_structure
 
-    def process_url(self, url, depth):
-        """Process a single URL and return new URLs to crawl."""
-        # Normalize the URL (remove fragments)
-        url = self.normalize_url(url)
-
+    async def _worker(self, queue):
+        """Process URLs from the queue and queue the new URLs they link to."""
+        while True:
+            url, depth = await queue.get()
+            try:
+                # Skip if depth exceeds max_depth, process_url skips visited URLs
+                if depth <= self.max_depth:
+                    links = await self.process_url(url, depth)
+
+                    # Filter new URLs here, before they are queued
+                    if depth < self.max_depth:
+                        for link, link_domain in links:
+                            if link in self.visited_urls:
+                                continue
+                            if (
+                                not self.restrict_to_domain
+                                or link_domain == self.base_domain
+                            ):
+                                queue.put_nowait((link, depth + 1))
+            except Exception as e:
+                print(f"Error processing {url}: {e}")
+            finally:
+                queue.task_done()
+
+    async def process_url(self, url, depth):
+        """Process a single URL and return its (link, domain) pairs."""
         # Check if URL is valid
         try:
             parsed = urlparse(url)
             if not parsed.scheme or not parsed.netloc:
                 return []
 
-            # Check if already visited (double-check with lock)
-            with self.visited_lock:
-                if url in self.visited_urls:
-                    return []
-                self.visited_urls.add(url)
+            # Check if already visited and mark it in one set operation. All
+            # workers share one event loop, so nothing runs in between.
+            visited_count = len(self.visited_urls)
+            self.visited_urls.add(url)
+            if len(self.visited_urls) == visited_count:
+                return []
 
             # Initialize entry in link structure
-            with self.structure_lock:
-                self.link_structure[url] = []
+            self.link_structure[url] = []
 
             print(f"Crawling: {url} (depth: {depth})")
 
             # Apply rate limiting for the domain
             domain = parsed.netloc
-            self.apply_rate_limit(domain)
+            await self.apply_rate_limit(domain)
 
             # Check for cached content
             cached_content = None
@@ -175,68 +202,58 @@ class WebCrawler:
                 filename = self.get_filename_for_url(url)
                 filepath = os.path.join(self.save_path, filename)
 
-                # Use file lock when checking/reading cache
-                with self.file_lock:
-                    if os.path.exists(filepath):
-                        print(f"Using cached version for: {url}")
-                        try:
-                            with open(filepath, "r", encoding="utf-8") as f:
-                                cached_content = f.read()
-                        except Exception as e:
-                            print(f"Error reading cache for {url}: {e}")
-                            cached_content = None
+                # Opening the file directly saves a separate existence check
+                try:
+                    with open(filepath, "r", encoding="utf-8") as f:
+                        cached_content = f.read()
+                    print(f"Using cached version for: {url}")
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    print(f"Error reading cache for {url}: {e}")
+                    cached_content = None
 
             # Fetch or use cached content
             if cached_content:
                 links = self.extract_links_from_content(url, cached_content)
             else:
-                links, content = self.fetch_links_and_content(url)
+                links, content = await self.fetch_links_and_content(url)
 
                 # Save content if needed
                 if self.save_path and content:
                     self.save_page(url, content)
 
             # Update link structure
-            with self.structure_lock:
-                self.link_structure[url] = links
-
-            # Return new URLs to crawl (make sure they're normalized too)
-            new_urls = []
-            for link in links:
-                # Normalize the link
-                link = self.normalize_url(link)
-
-                with self.visited_lock:
-                    if link in self.visited_urls:
-                        continue
+            self.link_structure[url] = [link for link, _ in links]
 
-                link_domain = urlparse(link).netloc
-                if not self.restrict_to_domain or link_domain == self.base_domain:
-                    new_urls.append(link)
-
-            return new_urls
+            return links
 
         except Exception as e:
             print(f"Error processing {url}: {e}")
             return []
 
-    def apply_rate_limit(self, domain):
+    async def apply_rate_limit(self, domain):
         """Apply rate limiting for requests to the same domain."""
-        with self.domain_lock:
+        lock = self.domain_locks.get(domain)
+        if lock is None:
+            lock = self.domain_locks[domain] = asyncio.Lock()
+
+        # Only requests to the same domain wait for each other
+        async with lock:
             current_time = time.time()
             if domain in self.domain_timestamps:
                 # Calculate how long to wait
                 last_access = self.domain_timestamps[domain]
                 elapsed = current_time - last_access
                 if elapsed < self.rate_limit:
-                    time.sleep(self.rate_limit - elapsed)
+                    await asyncio.sleep(self.rate_limit - elapsed)
 
             # Update timestamp
             self.domain_timestamps[domain] = time.time()
 
     def extract_links_from_content(self, url, content):
-        """Extract links from HTML content."""
-        soup = BeautifulSoup(content, "html.parser")
+        """Extract (link, domain) pairs from HTML content."""
+        soup = BeautifulSoup(content, "lxml", parse_only=_LINK_STRAINER)
         links = []
 
         for a_tag in soup.find_all("a", href=True):
@@ -258,22 +275,21 @@ class WebCrawler:
                 if not parsed.scheme or not parsed.netloc:
                     continue
 
-                links.append(absolute_url)
+                # Keep the domain, so it does not need to be parsed again
+                links.append((absolute_url, parsed.netloc))
             except Exception:
                 # If URL parsing fails, skip this URL
                 continue
 
         return links
 
-    def fetch_links_and_content(self, url):
+    async def fetch_links_and_content(self, url):
         """Fetch links and content from a URL."""
-        headers = {"User-Agent": "PythonWebCrawler/1.0"}
+        async with self.session.get(url) as response:
+            response.raise_for_status()
 
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        # Store the content
-        content = response.text
+            # Store the content
+            content = await response.text(errors="replace")
 
         # Parse links
         links = self.extract_links_from_content(url, content)
@@ -294,9 +310,6 @@ class WebCrawler:
         # Remove scheme and www if present
         domain = parsed_url.netloc.replace("www.", "")
 
-        # Hash the path for unique filenames
-        path_hash = hashlib.md5(parsed_url.path.encode()).hexdigest()[:8]
-        
         # Create query hash if query exists
         query_part = ""
         if parsed_url.query:
@@ -306,17 +319,18 @@ class WebCrawler:
             path = parsed_url.path.rstrip("/")
             filename = f"{domain}{path.replace('/', '_')}{query_part}"
             if len(filename) > 100:  # Limit filename length
+                # Hash the path for unique filenames
+                path_hash = hashlib.md5(parsed_url.path.encode()).hexdigest()[:8]
                 filename = f"{domain}_{path_hash}{query_part}"
         else:
             filename = f"{domain}_index{query_part}"
 
         # Ensure filename is valid and add extension
-        filename = "".join(c if c.isalnum() or c in "_-." else "_" for c in filename)
+        filename = filename.translate(_FILENAME_TABLE)
         filename = f"{filename}.html"
 
         # Store in map for consistency
-        with self.file_lock:
-            self.url_to_filename_map[url] = filename
+        self.url_to_filename_map[url] = filename
 
         return filename
 
@@ -325,9 +339,18 @@ class WebCrawler:
         filename = self.get_filename_for_url(url)
         file_path = os.path.join(self.save_path, filename)
 
-        with self.file_lock:
-            with open(file_path, "w", encoding="utf-8") as f:
+        # Write to a temporary file first, so an interrupted write never
+        # leaves a partial page behind to be picked up as cached content
+        tmp_path = f"{file_path}.tmp.{os.getpid()}"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
                 f.write(content)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            # Don't leave the temporary file behind after a failed save
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
 
     def print_link_structure(self):
         """Print the discovered link structure."""
@@ -26,7 +26,7 @@ def main():
         help="Directory to save crawled pages (default: None)",
     )
     parser.add_argument(
-        "--threads", type=int, default=10, help="Number of worker threads (default: 10)"
+        "--threads", type=int, default=10, help="Number of concurrent workers (default: 10)"
     )
     parser.add_argument(
         "--rate-limit",
@@ -41,7 +41,7 @@ def main():
     print(f"URL: {args.url}")
     print(f"Max Depth: {args.max_depth}")
     print(f"Restrict to Domain: {args.restrict_domain}")
-    print(f"Threads: {args.threads}")
+    print(f"Workers: {args.threads}")
     print(f"Rate Limit: {args.rate_limit} seconds")
     if args.save_path:
         print(f"Saving pages to: {args.save_path}")
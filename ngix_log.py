@@ -6,112 +6,122 @@
 import os
 import requests
 import tarfile
-import subprocess
-import pandas as pd
+import time
+import urllib3
+import xlsxwriter
 from datetime import datetime
 
-
-def download_file(url, save_path):
-    """从指定URL下载文件"""
-    print(f"正在从 {url} 下载文件...")
-    try:
-        response = requests.get(url, stream=True)
+# 用于删除所有引号的转换表
+_QUOTE_TABLE = str.maketrans("", "", '"')
+
+# Excel工作表的最大行数和列数
+_EXCEL_MAX_ROWS = 1048576
+_EXCEL_MAX_COLS = 16384
+# Excel单元格最多保存的字符数
+_EXCEL_MAX_STRING = 32767
+
+
+def print_progress(downloaded, total_size):
+    """显示下载进度"""
+    # 服务器没有返回文件大小时只显示已下载的字节数
+    done = int(50 * downloaded / total_size) if total_size else 0
+    print(
+        f"\r下载进度: [{'=' * done}{' ' * (50-done)}] {downloaded}/{total_size} 字节",
+        end="",
+    )
+
+
+class ProgressReader:
+    """包装下载流，读取数据时显示下载进度"""
+
+    def __init__(self, raw, total_size):
+        self.raw = raw
+        self.total_size = total_size
+        self.downloaded = 0
+        self.last_print = 0.0
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        # 按网络上收到的字节数计算，和Content-Length一致，
+        # 服务器另外压缩传输时解压后的数据会更多
+        self.downloaded = self.raw.tell()
+        # 显示下载进度，最多每0.1秒刷新一次
+        now = time.monotonic()
+        if now - self.last_print >= 0.1:
+            print_progress(self.downloaded, self.total_size)
+            self.last_print = now
+        return data
+
+
+def stream_baidu_rows(url):
+    """边下载边解压，逐行返回包含baidu的行按空格分割并去掉引号后的内容"""
+    print(f"正在从 {url} 下载并查找包含'baidu'的行...")
+    with requests.get(url, stream=True) as response:
         response.raise_for_status()
+        # 只解开HTTP层的压缩，.tar.gz本身由tarfile解压
+        response.raw.decode_content = True
 
         total_size = int(response.headers.get("content-length", 0))
-        block_size = 8192
-        downloaded = 0
-
-        with open(save_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=block_size):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    # 显示下载进度
-                    done = int(50 * downloaded / total_size)
-                    print(
-                        f"\r下载进度: [{'=' * done}{' ' * (50-done)}] {downloaded}/{total_size} 字节",
-                        end="",
-                    )
-
+        reader = ProgressReader(response.raw, total_size)
+
+        # 流模式直接从网络读取，不再保存压缩包和解压后的文件
+        # 每次读取64KB，默认的10KB块太小
+        with tarfile.open(fileobj=reader, mode="r|gz", bufsize=65536) as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                for line in tar.extractfile(member):
+                    if b"baidu" in line:
+                        # 分割后再移除每个部分中的引号，""这样的空字段仍占一列
+                        parts = line.decode("utf-8", errors="replace").split()
+                        yield [part.translate(_QUOTE_TABLE) for part in parts]
+
+        print_progress(reader.downloaded, total_size)
         print("\n下载完成!")
-        return True
-    except Exception as e:
-        print(f"下载失败: {e}")
-        return False
 
 
-def extract_tarfile(tar_path, extract_dir):
-    """解压缩tar.gz文件"""
-    print(f"正在解压缩 {tar_path} 到 {extract_dir}...")
+def convert_to_excel(rows, excel_file):
+    """将分割后的行转换为Excel格式"""
+    print("正在转换为Excel格式...")
     try:
-        if not os.path.exists(extract_dir):
-            os.makedirs(extract_dir)
-
-        with tarfile.open(tar_path, "r:gz") as tar:
-            tar.extractall(path=extract_dir)
-
-        print("解压缩完成!")
-        return True
-    except Exception as e:
-        print(f"解压缩失败: {e}")
-        return False
-
-
-def grep_baidu(directory, output_file):
-    """使用grep查找包含baidu的行"""
-    print(f"正在查找包含'baidu'的行...")
-    try:
-        # 使用grep递归搜索目录中所有文件
-        cmd = f"grep -r 'baidu' {directory} > {output_file}"
-        subprocess.run(cmd, shell=True, check=True)
-
-        # 检查结果文件大小
-        file_size = os.path.getsize(output_file)
-        print(f"查找完成! 找到的结果已保存到 {output_file} (大小: {file_size} 字节)")
-        return True
-    except Exception as e:
-        print(f"查找失败: {e}")
-        return False
-
-
-def convert_to_excel(text_file, excel_file):
-    """将文本文件转换为Excel格式"""
-    print(f"正在将 {text_file} 转换为Excel格式...")
-    try:
-        # 读取文本文件
-        with open(text_file, "r", encoding="utf-8", errors="replace") as f:
-            lines = f.readlines()
-
-        # 处理数据
-        data = []
-        for line in lines:
-            # 分割行内容（按空格分割）
-            parts = line.strip().split()
-
-            # 移除每个部分中的引号
-            cleaned_parts = []
-            for part in parts:
-                # 移除开头和结尾的引号（如果存在）
-                if part.startswith('"') and part.endswith('"'):
-                    part = part[1:-1]
-                # 移除其他引号
-                part = part.replace('"', "")
-                cleaned_parts.append(part)
-
-            data.append(cleaned_parts)
-
-        # 确定最大列数
-        max_cols = max(len(row) for row in data) if data else 0
-
-        # 创建列名
-        columns = [f"Column_{i+1}" for i in range(max_cols)]
-
-        # 创建DataFrame
-        df = pd.DataFrame(data, columns=columns)
-
-        # 保存为Excel
-        df.to_excel(excel_file, index=False, engine="openpyxl")
+        # 直接使用传入的行，不再复制一份
+        max_cols = max(map(len, rows), default=0)
+
+        # xlsxwriter不会因为超出范围报错，只会丢弃这些行，需要提前检查
+        if len(rows) + 1 > _EXCEL_MAX_ROWS or max_cols > _EXCEL_MAX_COLS:
+            raise ValueError(
+                f"数据太大: {len(rows)} 行, {max_cols} 列, "
+                f"Excel最多支持 {_EXCEL_MAX_ROWS - 1} 行数据和 {_EXCEL_MAX_COLS} 列"
+            )
+
+        # 保存为Excel，constant_memory模式下每写完一行就写入磁盘
+        # 出错时也要关闭workbook，否则临时文件不会被删除
+        with xlsxwriter.Workbook(
+            excel_file,
+            {
+                "constant_memory": True,
+                "strings_to_formulas": False,
+                "strings_to_urls": False,
+            },
+        ) as workbook:
+            worksheet = workbook.add_worksheet()
+
+            # 创建列名
+            # write_row失败时返回负数而不是抛出异常
+            if worksheet.write_row(0, 0, [f"Column_{i+1}" for i in range(max_cols)]) < 0:
+                raise ValueError("写入列名失败")
+            for row_num, row in enumerate(rows, start=1):
+                error = worksheet.write_row(row_num, 0, row)
+                if error == -2:
+                    # 字段超过单元格长度上限时write_row会停在这一列，
+                    # 截断超长的字段后重新写入整行
+                    print(
+                        f"警告: 第 {row_num} 行有字段超过 {_EXCEL_MAX_STRING} 个字符，已截断"
+                    )
+                    for col, part in enumerate(row):
+                        worksheet.write(row_num, col, part[:_EXCEL_MAX_STRING])
+                elif error < 0:
+                    raise ValueError(f"写入第 {row_num} 行失败")
 
         print(f"转换完成! Excel文件已保存为 {excel_file}")
         return True
@@ -125,21 +135,21 @@ def main():
     # 创建时间戳文件夹
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     work_dir = f"baixing_seo_{timestamp}"
-    if not os.path.exists(work_dir):
-        os.makedirs(work_dir)
+    os.makedirs(work_dir, exist_ok=True)
 
     # 设置文件路径
     url = "http://examine.baixing.com/logs/baixing_seo.tar.gz"
-    tar_file = os.path.join(work_dir, "baixing_seo.tar.gz")
-    extract_dir = os.path.join(work_dir, "extracted")
-    baidu_log = os.path.join(work_dir, "baidu_results.txt")
     excel_file = os.path.join(work_dir, "baidu_results.xlsx")
 
-    # 执行任务
-    if download_file(url, tar_file):
-        if extract_tarfile(tar_file, extract_dir):
-            if grep_baidu(extract_dir, baidu_log):
-                convert_to_excel(baidu_log, excel_file)
+    # 执行任务，下载、解压和查找在同一个流水线中完成
+    try:
+        rows = list(stream_baidu_rows(url))
+    except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
+        print(f"\n下载失败: {e}")
+    except tarfile.TarError as e:
+        print(f"\n解压缩失败: {e}")
+    else:
+        convert_to_excel(rows, excel_file)
 
     print(f"\n所有任务完成! 结果保存在目录: {work_dir}")
     print(f"Excel文件路径: {excel_file}")